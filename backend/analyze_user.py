@@ -1,17 +1,30 @@
 import os
-import time
 import re
 import argparse
+import csv
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from queue import Queue, Empty
 import pandas as pd
+import requests
 from dotenv import load_dotenv
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    InvalidSessionIdException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from chrome_driver import get_driver_path
+from polymarket_api import create_session, fetch_closed_positions
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +32,153 @@ load_dotenv()
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 CSV_DIR = os.path.join(BASE_DIR, "csv")
 
+# Column order of the output stats CSV
+STATS_FIELDS = [
+    "Rank", "Name", "Profile URL", "Wins", "Losses", "Total Won", "Total Lost",
+    "Win Rate", "Duplicate Bets", "Hedged Bets", "Notes"
+]
+
+# Profile page controls, built once instead of per user.
+# The Closed tab and Date item are only identifiable by label, which CSS cannot match.
+CLOSED_TAB_XPATH = "//button[contains(text(), 'Closed')]"
+# Labels the sort dropdown shows for its current state
+SORT_KEYWORDS = ("Profit/Loss", "Date", "Value", "Alphabetically", "Sort")
+SORT_TRIGGER_CSS = "button[aria-haspopup='menu'], button[data-slot='dropdown-menu-trigger']"
+SORT_FALLBACK_XPATH = "//button[" + " or ".join(f"contains(., '{k}')" for k in SORT_KEYWORDS) + "]"
+OPEN_MENU_CSS = "[role='menu'], [role='listbox']"
+MENU_ITEMS_CSS = "[role='menu'] [role='menuitem'], [role='listbox'] [role='option']"
+DATE_OPTION_XPATH = "//div[(@role='menuitem' or @role='option') and contains(., 'Date')]"
+
+# Returns [button, label] for the first element matching selector arguments[0] whose label
+# contains one of the keywords in arguments[1], or null, so no per-candidate .text round-trips
+FIND_SORT_TRIGGER_JS = """
+for (const button of document.querySelectorAll(arguments[0])) {
+    const label = button.innerText;
+    if (arguments[1].some(keyword => label.includes(keyword))) return [button, label];
+}
+return null;
+"""
+
+# Requests Chrome should never make while scraping profiles
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.woff*", "*.mp4", "*.webm",
+    "*google-analytics*", "*googletagmanager*", "*doubleclick*", "*segment.io*", "*sentry.io*"
+]
+
+# Notes values for users whose profile could not be opened/sorted, or whose closed positions
+# could not be fetched from the data API (neither is cached between runs)
+NAVIGATION_ERROR_NOTE = "Navigation/Sort Error"
+API_ERROR_NOTE = "Data API Error"
+RETRY_NOTES = (NAVIGATION_ERROR_NOTE, API_ERROR_NOTE)
+
+# Leads the Notes of rows read with --api: the data API has one aggregated position per
+# market outcome (so no duplicate bets), and its amounts are realized P&L, not bet amounts
+API_ROW_NOTE = "Data API (realized P&L, no duplicates)"
+
+# Status badge of a settled bet row in the "Closed" tab
+BET_STATUS_XPATH = "//*[contains(text(), 'Won') or contains(text(), 'Lost')]"
+
+# "Won <amount> <outcome> at" / "Lost <amount> <outcome> at" in a bet row's text
+# (DOTALL so the fields may sit on separate lines of the row)
+BET_PATTERN = re.compile(r'(Won|Lost)\s+([\d\.,]+)\s+(.*?)\s+at', re.DOTALL)
+
+# Walks the text nodes once to find the Won/Lost badges, resolves each badge's row
+# (outermost <a>, or outermost of the 5 nearest grid/flex <div> ancestors) and returns
+# {text, href, element_location} per row, so a whole scroll position is one round-trip.
+# Rows with several matching text nodes are deduplicated by node identity in the browser,
+# and the walk stops after arguments[0] rows when a bet limit is set.
+# The first arguments[1] rows were read on an earlier call and are only counted, not read
+# again (innerText forces layout), so each row crosses the driver once. The top row's
+# {text, href} is always returned as `first` to tell a growing list from a virtualized one.
+SCRAPE_ROWS_JS = """
+const limit = arguments[0];
+const skip = arguments[1];
+const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+const seen = new Set();
+const rows = [];
+let first = null;
+for (let node = walker.nextNode(); node && !(limit && seen.size >= limit); node = walker.nextNode()) {
+    if (!/Won|Lost/.test(node.data)) continue;
+    let row = null;
+    let layoutDivs = 0;
+    for (let el = node.parentElement.parentElement; el; el = el.parentElement) {
+        const cls = el.getAttribute('class') || '';
+        if (el.tagName === 'A') {
+            row = el;
+        } else if (el.tagName === 'DIV' && layoutDivs < 5 && (cls.includes('grid') || cls.includes('flex'))) {
+            layoutDivs++;
+            row = el;
+        }
+    }
+    if (!row || seen.has(row)) continue;
+    seen.add(row);
+    if (seen.size <= skip) {
+        if (seen.size === 1) first = {text: row.innerText, href: row.href || null};
+        continue;
+    }
+    rows.push({
+        text: row.innerText,
+        href: row.href || null,
+        element_location: row.getBoundingClientRect().top + window.scrollY
+    });
+}
+return {first: first || rows[0] || null, rows: rows};
+"""
+
+# Scrolls to the bottom and resolves with true as soon as the page height grows (more bets
+# were lazy-loaded), or with false after arguments[0] ms if nothing more arrives
+SCROLL_FOR_MORE_JS = """
+const done = arguments[arguments.length - 1];
+const start = document.body.scrollHeight;
+const deadline = Date.now() + arguments[0];
+window.scrollTo(0, start);
+const timer = setInterval(() => {
+    const height = document.body.scrollHeight;
+    if (height !== start || Date.now() >= deadline) {
+        clearInterval(timer);
+        done(height !== start);
+    }
+}, 100);
+"""
+SCROLL_WAIT_MS = 2000
+
+# Seconds to wait for the top bet row to change after choosing "Date"; an already date-sorted
+# list keeps its top row, so this is only a short grace period, not an expected wait
+SORT_SETTLE_WAIT = 1.5
+
+# Virtualized lists recycle rows, so jumping to the bottom would skip everything in between.
+# Scrolls one viewport down (or to arguments[1] when given) and resolves once the list has
+# re-rendered; only at the bottom does it wait up to arguments[0] ms for more rows.
+# Resolves with true while the scroll position or page height still changes.
+SCROLL_STEP_JS = """
+const done = arguments[arguments.length - 1];
+const start = document.body.scrollHeight;
+const before = window.scrollY;
+if (arguments[1] === null) {
+    window.scrollBy(0, Math.floor(window.innerHeight * 0.8));
+} else {
+    window.scrollTo(0, arguments[1]);
+}
+const settle = result => requestAnimationFrame(() => requestAnimationFrame(() => done(result)));
+if (window.scrollY !== before && window.scrollY + window.innerHeight < document.body.scrollHeight - 1) {
+    settle(true);
+} else {
+    const deadline = Date.now() + arguments[0];
+    const timer = setInterval(() => {
+        const height = document.body.scrollHeight;
+        if (height !== start || Date.now() >= deadline) {
+            clearInterval(timer);
+            settle(height !== start || window.scrollY !== before);
+        }
+    }, 100);
+}
+"""
+
+# Users scraped before the session's cookies, cache and site storage are cleared, and
+# before the whole browser is replaced with a fresh one
+BROWSER_RESET_EVERY = 50
+DRIVER_RECYCLE_EVERY = 500
+
 def log(message):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {message}")
@@ -31,20 +191,66 @@ def resolve_csv_path(path):
 
 def setup_driver():
     options = webdriver.ChromeOptions()
-    # options.add_argument("--headless")  # Uncomment to run in headless mode
+    options.add_argument("--headless=new")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     # Mask automation to avoid some basic detection (optional but good practice)
-    options.add_argument("--disable-blink-features=AutomationControlled") 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    # Batch scraping only needs the DOM text, so skip everything that only affects rendering
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--disable-sync")
+    options.add_argument("--metrics-recording-only")
+    options.add_argument("--mute-audio")
+    options.add_argument("--disable-renderer-backgrounding")
+    options.add_argument("--disable-features=Translate,MediaRouter")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--window-size=1280,1024")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2
+    })
+    # Cap the HTTP cache so the warm Polymarket assets survive between users without growing unbounded
+    options.add_argument("--disk-cache-size=50000000")
+    # No --user-data-dir: chromedriver gives every session its own throwaway profile and
+    # DevTools port, so parallel sessions (and concurrent runs) never share a profile lock
+    # Return from driver.get() at DOMContentLoaded; the explicit waits in
+    # navigate_and_sort_bets already block until the elements we need exist
+    options.page_load_strategy = 'eager'
+    driver = webdriver.Chrome(service=Service(get_driver_path()), options=options)
+    # Every wait in this module is an explicit WebDriverWait; an implicit wait would be
+    # applied again inside each of their polls and inflate the timeout paths
+    driver.implicitly_wait(0)
+
+    # Images, fonts and analytics beacons never affect the scraped text, so block them at
+    # the network layer and keep the HTTP cache warm across profile visits in this session
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": False})
     return driver
 
+def reset_browser_state(driver):
+    driver.delete_all_cookies()
+    driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+    driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": "https://polymarket.com", "storageTypes": "all"})
+
+def restart_driver(driver):
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass  # Already gone
+    return setup_driver()
+
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Analyze Polymarket user betting history.")
     parser.add_argument("--user-limit", type=int, default=None, help="Limit the number of users to scan from the CSV.")
     parser.add_argument("--bet-limit", type=int, default=None, help="Limit the number of bets to scan per user. Default is all bets.")
     parser.add_argument("--csv-file", type=str, default="polymarket_leaderboard_monthly.csv", help="Path to the leaderboard CSV file.")
     parser.add_argument("--output-file", type=str, default="polymarket_user_stats.csv", help="Path to save the analysis output CSV.")
+    parser.add_argument("--rescan", action="store_true", help="Scrape every user again, even those already in the output CSV.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of users to analyze in parallel.")
+    parser.add_argument("--api", action="store_true", help="Read closed positions from the data API instead of scraping profile pages (no duplicate detection; totals are realized P&L).")
     return parser.parse_args()
 
 def extract_and_analyze_bets(driver, bet_limit):
@@ -53,291 +259,167 @@ def extract_and_analyze_bets(driver, bet_limit):
     # Wait for at least one bet to appear or timeout
     try:
         WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Won') or contains(text(), 'Lost')]"))
+            EC.presence_of_element_located((By.XPATH, BET_STATUS_XPATH))
         )
-    except:
+    except TimeoutException:
         log("No closed bets found or timeout.")
         return {}
 
     unique_bets_data = [] # List of dicts storing extracted data
-    processed_texts = [] # To help with overlap detection if needed, or just use the full list
     
-    last_height = driver.execute_script("return document.body.scrollHeight")
     scroll_attempts = 0
     max_scroll_attempts = 3
     
-    # We will try to rely on the order of elements.
-    # To avoid overlap duplicates:
-    # We can keep track of the list of bet texts we have already added.
-    # But since duplicates are allowed, we can't just check "if text in list".
-    # We need to check if the *new batch* overlaps with the *end of the old batch*.
-    
-    # Simpler approach for now:
-    # 1. Scroll to top.
-    # 2. Extract visible.
-    # 3. Scroll down.
-    # 4. Extract visible.
-    # 5. Filter out the ones that match the *tail* of the previous extraction?
-    # Actually, often standard scrolling + `set` of WebElements (by ID) works if we don't hold them too long.
-    # But IDs change on re-render.
-    
-    # Let's try: Extract text immediately.
-    # Maintain a list of all extracted bet texts.
-    # To prevent overlap (seeing same bet twice due to partial scroll):
-    # We need a unique ID.
-    # Let's look for a link with a unique ID in the row.
+    # Normally the list only grows at the bottom, so the rows already collected are the
+    # first len(unique_bets_data) rows on the page and the browser only returns the ones after them.
+    # If the row we started with disappears, the list is virtualized: switch to stepping
+    # through it a viewport at a time and key rows by their position on the page.
+    seen = set()
+    virtual = False
+    first_row = None
     
     while True:
-        # Find all visible rows
-        status_elements = driver.find_elements(By.XPATH, "//*[contains(text(), 'Won') or contains(text(), 'Lost')]")
-        
-        current_batch_data = []
-        
-        for status_el in status_elements:
-            try:
-                row = status_el.find_element(By.XPATH, "./ancestor::a | ./ancestor::div[contains(@class, 'grid') or contains(@class, 'flex')][position() < 6]")
-                text_content = row.text
-                
-                # Try to get a unique link or ID
-                try:
-                    href = row.get_attribute("href")
-                except:
-                    href = None
-                    
-                current_batch_data.append({
-                    "text": text_content,
-                    "href": href,
-                    "element_location": row.location['y'] # Y-coord to help sort/dedupe in current view
-                })
-            except:
-                continue
+        # Read the new rows in the browser
+        # Rows keep accumulating from the top, so the first bet_limit rows are all we can use
+        skip = 0 if virtual else len(unique_bets_data)
+        scraped = driver.execute_script(SCRAPE_ROWS_JS, bet_limit, skip)
+        current_batch_data = scraped['rows']
         
         # Sort current batch by Y location to ensure order
         current_batch_data.sort(key=lambda x: x['element_location'])
         
-        # Deduplicate overlap with previous data
-        # We assume new bets appear at the bottom.
-        # We just need to append the *new* ones.
-        # Naive check: if we have seen this (text+href) in the *last N* items, skip?
-        # Better: iterate through current batch. If item matches the *last added item*, skip.
-        # But what if I have 2 identical bets in a row?
-        # The overlap will likely be a *sequence*.
-        
-        # Robust Infinite Scroll Scraping:
-        # Just use a Set of (href, text) if we assume (href+text) is unique enough for a *bet*.
-        # If I bet twice on same market -> same Text, same Href (to market).
-        # So Set deduction removes valid duplicates!
-        
-        # Fallback:
-        # We append ONLY items that are visually below the previous extraction?
-        # No, we scroll.
-        
-        # Let's assume that if we see the EXACT SAME LIST of bets as last time, we are done.
-        # We will optimistically append *all* bets from the first screen.
-        # For subsequent screens, we check if the first K items match the last K items of previous.
-        
-        # Simplest valid strategy for this task:
-        # Just collect everything seen. If we over-count due to overlap, it's an error but safer than missing.
-        # But we can try to minimize overlap:
-        # We can track the index of the last processed element? No.
-        
-        # Let's use a "Seen Signature" of the last 5 added bets.
-        # When processing new batch, find where this signature occurs (if at all), and add everything after.
+        if scraped['first'] and not virtual:
+            top_row = (scraped['first']['text'], scraped['first']['href'])
+            if first_row is None:
+                first_row = top_row
+            elif top_row != first_row:
+                log("Bet list is virtualized; stepping through it one viewport at a time.")
+                virtual = True
+                seen = {position_key(item) for item in unique_bets_data}
+                driver.execute_async_script(SCROLL_STEP_JS, SCROLL_WAIT_MS, 0)
+                continue
         
-        new_items = []
-        if not unique_bets_data:
-            new_items = current_batch_data
-        else:
-            # Try to find overlap
-            # Look for the last item of unique_bets_data in current_batch_data
-            # Be careful of identical items.
-            
-            # Reverse search current batch for the last added item
-            last_item = unique_bets_data[-1]
-            match_index = -1
-            
-            # We look for the *sequence* of last 3 items to be safer
-            check_len = min(len(unique_bets_data), 3)
-            tail_signature = [ (x['text'], x['href']) for x in unique_bets_data[-check_len:] ]
-            
-            # Scan current batch for this signature
-            # We want to find the *first* occurrence of this signature? 
-            # Or the occurrence that aligns with the top?
-            
-            # Naive: Just find the last item's match in current batch
-            for i, item in enumerate(current_batch_data):
-                if item['text'] == last_item['text'] and item['href'] == last_item['href']:
-                    # Potential match. Check previous items if possible.
-                    match = True
-                    for k in range(1, check_len):
-                        prev_idx = i - k
-                        if prev_idx < 0:
-                            # If we run off start of current batch, we assume match (overlap start)
-                            break
-                        
-                        hist_item = unique_bets_data[-(1+k)]
-                        curr_item = current_batch_data[prev_idx]
-                        if not (curr_item['text'] == hist_item['text'] and curr_item['href'] == hist_item['href']):
-                            match = False
-                            break
-                    
-                    if match:
-                        match_index = i
-            
-            # If match found, take everything after match_index
-            if match_index != -1:
-                new_items = current_batch_data[match_index+1:]
-            else:
-                # No overlap found? Maybe we scrolled too far? 
-                # Or completely new set?
-                # Append all.
-                new_items = current_batch_data
-                
-        # Add new items
-        for item in new_items:
+        for item in current_batch_data:
+            if virtual:
+                key = position_key(item)
+                if key in seen:
+                    continue
+                seen.add(key)
             unique_bets_data.append(item)
+            if bet_limit and len(unique_bets_data) >= bet_limit:
+                break
             
         if bet_limit and len(unique_bets_data) >= bet_limit:
             break
             
         # Scroll logic
         if not bet_limit or len(unique_bets_data) < bet_limit:
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
+            # Scroll, wait and compare heights in one browser call instead of sleeping
+            if virtual:
+                progressed = driver.execute_async_script(SCROLL_STEP_JS, SCROLL_WAIT_MS, None)
+            else:
+                progressed = driver.execute_async_script(SCROLL_FOR_MORE_JS, SCROLL_WAIT_MS)
+            if progressed:
+                scroll_attempts = 0
+            else:
                 scroll_attempts += 1
                 if scroll_attempts >= max_scroll_attempts:
                     break
-            else:
-                last_height = new_height
-                scroll_attempts = 0
         else:
             break
             
     log(f"Found {len(unique_bets_data)} bets.")
     
-    processed_bets = 0
-    wins = 0
-    losses = 0
-    total_won = 0.0
-    total_lost = 0.0
-    
-    bet_history = {} 
-    market_outcomes = {}
-    
-    # Process the extracted data
-    for item in unique_bets_data:
-        try:
-            text_content = item['text']
-            lines = text_content.split('\n')
-            
-            if not lines: continue
-            
-            title = lines[0].strip()
-            status = "Unknown"
-            amount_str = "0"
-            outcome = "Unknown"
-            
-            full_text = " ".join(lines)
-            
-            if not lines: continue
-            
-            title = lines[0].strip()
-            
-            status = "Unknown"
-            amount_str = "0"
-            outcome = "Unknown"
-            
-            full_text = " ".join(lines)
-            
-            if "Won" in full_text:
-                status = "Won"
-                wins += 1
-                try:
-                    # Regex to find "Won <amount> <outcome> at" or "Lost <amount> <outcome> at"
-                    match = re.search(r'(Won|Lost)\s+([\d\.,]+)\s+(.*?)\s+at', full_text)
-                    if match:
-                        amount_str = match.group(2).replace(',', '')
-                        outcome = match.group(3)
-                        val = float(amount_str)
-                        total_won += val
-                except Exception as e:
-                    # print(f"Regex error: {e}")
-                    pass
+    return summarize_bets(parse_bet_rows(item['text'] for item in unique_bets_data))
 
-            elif "Lost" in full_text:
-                status = "Lost"
-                losses += 1
-                try:
-                    match = re.search(r'(Won|Lost)\s+([\d\.,]+)\s+(.*?)\s+at', full_text)
-                    if match:
-                        amount_str = match.group(2).replace(',', '')
-                        outcome = match.group(3)
-                        val = float(amount_str)
-                        total_lost += val
-                except:
-                    pass
-            else:
-                # Skip if neither won nor lost (e.g. pending/redeemed?)
+def position_key(item):
+    # A virtualized list places each logical row at a fixed offset, even when its node is recycled
+    return (round(item['element_location']), item['text'], item['href'])
+
+def parse_bet_rows(texts):
+    # Turn raw row texts into (title, status, outcome, amount) tuples, skipping unsettled rows
+    rows = []
+    for text_content in texts:
+        try:
+            # One match gives status, amount and outcome; rows without a
+            # "Won/Lost <amount> <outcome> at" line are not settled bets (e.g. pending/redeemed?)
+            match = BET_PATTERN.search(text_content)
+            if not match:
                 continue
 
-            # Track for duplicates (Same Title + Same Outcome)
-            key = (title, outcome)
-            if key not in bet_history:
-                bet_history[key] = []
-            
-            bet_history[key].append({
-                "title": title,
-                "outcome": outcome,
-                "status": status,
-                "amount": amount_str
-            })
-            
-            # Track for Hedging (Same Title, Any Outcome)
-            if title not in market_outcomes:
-                market_outcomes[title] = set()
-            market_outcomes[title].add(outcome)
+            title = text_content.partition('\n')[0].strip()
+            status, amount_str = match.group(1), match.group(2).replace(',', '')
+            outcome = match.group(3).replace('\n', ' ')
+            try:
+                amount = float(amount_str)
+            except ValueError:
+                amount = 0.0
+
+            rows.append((title, status, outcome, amount))
             
-        except Exception as e:
+        except (AttributeError, TypeError) as e:
             log(f"Error parsing row: {e}")
             continue
+    return rows
 
-    # Analyze duplicates
-    duplicates_info = []
-    
-    # Check for actual duplicates (same title, same outcome, count > 1)
-    for (title, outcome), bets in bet_history.items():
-        if len(bets) > 1:
-            duplicates_info.append({
-                "title": title,
-                "outcome": outcome,
-                "count": len(bets),
-                "type": "DUPLICATE", # Exact duplicate
-                "details": bets
-            })
-
-    # Check for Hedging (Same Title, Different Outcomes)
-    # We iterate over market_outcomes to see if any market has > 1 outcome
-    # Note: This is separate from "Duplicate Bets" count
-    hedged_markets = []
-    for title, outcomes in market_outcomes.items():
-        if len(outcomes) > 1:
-            hedged_markets.append({
-                "title": title,
-                "outcomes": list(outcomes)
-            })
+def summarize_bets(rows):
+    wins = losses = 0
+    total_won = total_lost = 0.0
+    bet_counts = defaultdict(int)
+    market_outcomes = defaultdict(dict)  # dict keeps outcomes in first-seen order
+    duplicates = {}
+    hedged = {}
+
+    # One pass: duplicate and hedge entries are created the moment a key crosses its
+    # threshold and updated in place afterwards, so no second loop over the groups is needed
+    for title, status, outcome, amount in rows:
+        if status == "Won":
+            wins += 1
+            total_won += amount
+        else:
+            losses += 1
+            total_lost += amount
+
+        # Duplicates: same title, same outcome, count > 1
+        key = (title, outcome)
+        bet_counts[key] += 1
+        count = bet_counts[key]
+        if count == 2:
+            duplicates[key] = {"title": title, "outcome": outcome, "count": count, "type": "DUPLICATE"}
+        elif count > 2:
+            duplicates[key]["count"] = count
+
+        # Hedging: same title, different outcomes
+        # Note: This is separate from "Duplicate Bets" count
+        outcomes = market_outcomes[title]
+        if outcome not in outcomes:
+            outcomes[outcome] = None
+            if len(outcomes) == 2:
+                hedged[title] = {"title": title, "outcomes": list(outcomes)}
+            elif len(outcomes) > 2:
+                hedged[title]["outcomes"].append(outcome)
 
     return {
         "wins": wins,
         "losses": losses,
         "total_won": total_won,
         "total_lost": total_lost,
-        "duplicates": duplicates_info,
-        "hedged_markets": hedged_markets
+        "duplicates": list(duplicates.values()),
+        "hedged_markets": list(hedged.values())
     }
 
+def position_rows(positions):
+    # Same (title, status, outcome, amount) rows parse_bet_rows reads off the page:
+    # a closed position is won when it realized a profit, and the amount is the size of that P&L.
+    # Break-even positions (or ones without a P&L) are neither, so they are skipped.
+    rows = []
+    for position in positions:
+        pnl = float(position.get("realizedPnl") or 0)
+        if pnl == 0:
+            continue
+        rows.append((position.get("title", ""), "Won" if pnl > 0 else "Lost", position.get("outcome", ""), abs(pnl)))
+    return rows
+
 def navigate_and_sort_bets(driver, profile_url):
     log(f"Navigating to {profile_url}...")
     driver.get(profile_url)
@@ -346,49 +428,40 @@ def navigate_and_sort_bets(driver, profile_url):
         wait = WebDriverWait(driver, 15)
         
         # 1. Click "Closed" tab
-        # Use exact text match or robust contains
-        closed_tab = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[text()='Closed'] | //button[contains(text(), 'Closed')]")))
+        closed_tab = wait.until(EC.element_to_be_clickable((By.XPATH, CLOSED_TAB_XPATH)))
         closed_tab.click()
         log("Clicked 'Closed' tab.")
-        time.sleep(3)
+
+        # Wait for the closed bets to render rather than sleeping a fixed amount.
+        # Users without closed bets never show a badge, so that is not an error here.
+        try:
+            WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.XPATH, BET_STATUS_XPATH)))
+        except TimeoutException:
+            log("Debug: No closed bets rendered after clicking 'Closed'.")
         
         # 2. Find and Click Sort Dropdown
         # We look for a button that has specific ARIA attributes or contains the sort text.
-        # Common sort states: Profit/Loss, Date, Value, Alphabetically
-        sort_keywords = ["Profit/Loss", "Date", "Value", "Alphabetically", "Sort"]
-        
-        sort_button = None
-        
-        # Try finding by ARIA attribute first (most robust for UI components like Radix)
-        try:
-            # Find all buttons that are menu triggers
-            candidates = driver.find_elements(By.XPATH, "//button[@aria-haspopup='menu'] | //button[@data-slot='dropdown-menu-trigger']")
-            for btn in candidates:
-                txt = btn.text
-                # If the button text matches one of our expected states, use it
-                if any(k in txt for k in sort_keywords):
-                    sort_button = btn
-                    break
-        except Exception as e:
-            log(f"Debug: Error finding buttons by attributes: {e}")
-            pass
+        # Common sort states: Profit/Loss, Date, Value, Alphabetically (see SORT_KEYWORDS)
+        # Try finding by ARIA attribute first (most robust for UI components like Radix):
+        # the first menu trigger whose text matches one of our expected states
+        found = driver.execute_script(FIND_SORT_TRIGGER_JS, SORT_TRIGGER_CSS, list(SORT_KEYWORDS))
+        sort_button, current_text = found if found else (None, "")
             
         if not sort_button:
             log("Debug: Fallback to text search for sort button...")
             # Fallback to strict text search in buttons
-            # We construct a robust XPath that looks for a button containing the text
-            xpath_conditions = " or ".join([f"contains(., '{k}')" for k in sort_keywords])
+            # SORT_FALLBACK_XPATH looks for a button containing any of the sort labels
             try:
-                sort_button = wait.until(EC.element_to_be_clickable((By.XPATH, f"//button[{xpath_conditions}]")))
-            except:
+                sort_button = wait.until(EC.element_to_be_clickable((By.XPATH, SORT_FALLBACK_XPATH)))
+            except TimeoutException:
                 log("Debug: Could not find sort button by text.")
                 # As a last resort, list all buttons to see what's there (for debugging if this fails)
                 # buttons = driver.find_elements(By.TAG_NAME, "button")
                 # print("Available buttons:", [b.text for b in buttons if b.is_displayed()])
-                raise Exception("Sort button not found")
+                raise NoSuchElementException("Sort button not found")
+            current_text = sort_button.text
             
         # Check current state
-        current_text = sort_button.text
         if "Date" in current_text and "Sort" not in current_text: # "Sort" might be a label "Sort by: Date"
              # If strictly "Date", it might be already sorted.
              pass
@@ -397,154 +470,331 @@ def navigate_and_sort_bets(driver, profile_url):
         if "Date" not in current_text or True: # Force click to ensure we see the menu to select Date
             sort_button.click()
             log(f"Clicked Sort dropdown (Text: '{current_text}').")
-            time.sleep(1)
+            # Remember the current top row's {text, href} in one round-trip (limit 1, skip 1)
+            first_row = driver.execute_script(SCRAPE_ROWS_JS, 1, 1)['first']
             
             # 3. Select "Date"
             # It's usually in a role='menu' or role='listbox'
             # We look for "Date" in a clickable element that is NOT the sort button itself
             
+            # Wait for the menu to open, then give the expected item only a short grace period
+            # so a non-div menu item reaches the fallback without burning the full timeout
+            wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, OPEN_MENU_CSS)))
             try:
                 # Look for the menu item specifically
                 # Radix UI often puts items in a div with role="menuitem"
-                date_option = wait.until(EC.element_to_be_clickable((By.XPATH, "//div[@role='menuitem' and contains(., 'Date')] | //div[@role='option' and contains(., 'Date')]")))
+                date_option = WebDriverWait(driver, 3).until(EC.element_to_be_clickable((By.XPATH, DATE_OPTION_XPATH)))
                 date_option.click()
                 log("Selected 'Date' option.")
-            except:
-                log("Debug: Standard menuitem selector failed. Trying broad text match.")
-                # Fallback: Find any visible element with text "Date" that appeared recently
-                date_elements = driver.find_elements(By.XPATH, "//*[contains(text(), 'Date')]")
-                clicked = False
-                for el in date_elements:
-                    if el.is_displayed() and el != sort_button:
-                        try:
-                            el.click()
-                            clicked = True
-                            log("Selected 'Date' option (broad match).")
-                            break
-                        except:
-                            continue
-                if not clicked:
-                     raise Exception("Could not click Date option")
-
-            time.sleep(3)
+            except (TimeoutException, ElementClickInterceptedException, StaleElementReferenceException):
+                log("Debug: Standard menuitem selector failed. Trying items of the open menu.")
+                # Fallback scoped to the open menu (any tag), with all labels read in one round-trip
+                menu_items = driver.find_elements(By.CSS_SELECTOR, MENU_ITEMS_CSS)
+                labels = driver.execute_script("return arguments[0].map(el => el.innerText);", menu_items) if menu_items else []
+                date_items = [el for el, label in zip(menu_items, labels) if 'Date' in label]
+                if not date_items:
+                     raise NoSuchElementException("Could not click Date option")
+                date_items[0].click()
+                log("Selected 'Date' option (menu fallback).")
+
+            # Compare the top row's text/href rather than waiting for its node to go stale:
+            # React may reorder keyed rows in place, and a list already in date order keeps
+            # its top row, so time out quietly after the short grace period
+            if first_row:
+                try:
+                    WebDriverWait(driver, SORT_SETTLE_WAIT, poll_frequency=0.2).until(
+                        lambda d: d.execute_script(SCRAPE_ROWS_JS, 1, 1)['first'] != first_row
+                    )
+                except TimeoutException:
+                    pass
             
-    except Exception as e:
-        log(f"Error navigating/sorting: {e}")
+    except InvalidSessionIdException:
+        raise  # The browser is gone; scrape_worker restarts it
+    except WebDriverException as e:
+        log(f"Error navigating/sorting ({type(e).__name__}): {e.msg}")
         return False
         
     return True
 
+def new_user_stat(rank, name, profile_url):
+    return {
+        "Rank": rank,
+        "Name": name,
+        "Profile URL": profile_url,
+        "Wins": 0,
+        "Losses": 0,
+        "Total Won": 0.0,
+        "Total Lost": 0.0,
+        "Win Rate": 0.0,
+        "Duplicate Bets": 0,
+        "Hedged Bets": 0,
+        "Notes": ""
+    }
+
+def record_results(user_stat, name, results):
+    if results:
+        log(f"  Results for {name}:")
+        log(f"  Wins: {results['wins']}, Losses: {results['losses']}")
+        log(f"  Total Won: ${results['total_won']:.2f}, Total Lost: ${results['total_lost']:.2f}")
+
+        user_stat["Wins"] = results['wins']
+        user_stat["Losses"] = results['losses']
+        user_stat["Total Won"] = results['total_won']
+        user_stat["Total Lost"] = results['total_lost']
+
+        total_bets = results['wins'] + results['losses']
+        if total_bets > 0:
+            user_stat["Win Rate"] = (results['wins'] / total_bets) * 100
+
+        notes = []
+        if results['duplicates']:
+            log(f"  Found {len(results['duplicates'])} duplicate bet groups:")
+
+            user_stat["Duplicate Bets"] = len(results['duplicates']) # Number of groups
+
+            for dup in results['duplicates']:
+                log(f"    - '{dup['title']}' ({dup['outcome']}) appeared {dup['count']} times")
+                notes.append(f"{dup['title']}/{dup['outcome']} (x{dup['count']})")
+
+        # Add hedging info to notes
+        # (closed positions are one row per outcome, so hedges can't depend on duplicates)
+        if results['hedged_markets']:
+            log(f"  Found {len(results['hedged_markets'])} hedged markets:")
+            for h in results['hedged_markets']:
+                log(f"    - '{h['title']}' with outcomes: {', '.join(h['outcomes'])}")
+                notes.append(f"HEDGED: {h['title']} ({', '.join(h['outcomes'])})")
+
+        user_stat["Hedged Bets"] = len(results['hedged_markets'])
+        user_stat["Notes"] = "; ".join(notes)
+    else:
+        log("  No results found.")
+
+def analyze_profile(driver, rank, name, profile_url, bet_limit):
+    user_stat = new_user_stat(rank, name, profile_url)
+    if navigate_and_sort_bets(driver, profile_url):
+        record_results(user_stat, name, extract_and_analyze_bets(driver, bet_limit))
+    else:
+        user_stat["Notes"] = NAVIGATION_ERROR_NOTE
+    return user_stat
+
+def analyze_profile_api(session, rank, name, profile_url, bet_limit):
+    # The wallet address is the last path segment of the profile URL
+    user_stat = new_user_stat(rank, name, profile_url)
+    try:
+        positions = fetch_closed_positions(session, profile_url.rstrip('/').split('/')[-1], bet_limit)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        log(f"Error fetching closed positions for {name}: {e}")
+        user_stat["Notes"] = API_ERROR_NOTE
+        return user_stat
+    log(f"Found {len(positions)} closed positions.")
+    if positions:
+        record_results(user_stat, name, summarize_bets(position_rows(positions)))
+    else:
+        log("  No results found.")
+    # Mark the row so it isn't mistaken for (or averaged with) a scraped one
+    user_stat["Notes"] = "; ".join(note for note in (API_ROW_NOTE, user_stat["Notes"]) if note)
+    return user_stat
+
+
+def open_stats_writer(path):
+    # Append so an interrupted run keeps its progress; only a new file gets the header
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+    file = open(path, mode='a', newline='', encoding='utf-8')
+    writer = csv.DictWriter(file, fieldnames=STATS_FIELDS)
+    if write_header:
+        writer.writeheader()
+        file.flush()
+    return file, writer
+
+def load_scraped_urls(paths, api=False):
+    # Profile URLs successfully scraped into any of the given stats CSVs.
+    # Users that failed navigation or the API fetch are left out so the next run retries them,
+    # and so are rows from the other mode (--api or not), whose numbers mean something else.
+    done = set()
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                notes = row.get("Notes") or ""
+                if notes not in RETRY_NOTES and notes.startswith(API_ROW_NOTE) == api:
+                    done.add(row["Profile URL"])
+    return done
+
+def rank_sort_key(row):
+    # Older files hold float ranks ("1.0"); empty or unparsable ranks sort last
+    try:
+        return (False, float(row.get("Rank") or ""))
+    except ValueError:
+        return (True, 0.0)
+
+def compact_stats(output_path):
+    # Keep only the newest row per user, since retried and rescanned users were appended again
+    if not os.path.exists(output_path):
+        return
+    latest = {}
+    with open(output_path, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            latest.pop(row["Profile URL"], None)
+            latest[row["Profile URL"]] = row
+    if not latest:
+        return
+    # Workers append rows as users finish, so restore leaderboard order (unranked rows last)
+    rows = sorted(latest.values(), key=rank_sort_key)
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=STATS_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, output_path)
+
+def write_user_stat(user_stat, writer, file, write_lock):
+    # Sync every row to disk so a crash (or power loss) loses at most the users in progress
+    with write_lock:
+        writer.writerow(user_stat)
+        file.flush()
+        os.fsync(file.fileno())
+
+def scrape_worker(user_queue, bet_limit, writer, file, write_lock):
+    # One browser session pulling users off the shared queue until it is empty, so a
+    # worker that hits slow profiles doesn't hold up users another worker could take
+    driver = setup_driver()
+    count = 0
+    try:
+        while True:
+            try:
+                index, rank, name, profile_url = user_queue.get_nowait()
+            except Empty:
+                return
+
+            # Long-lived Chrome sessions slow down and grow in memory; clearing state is
+            # enough most of the time, with a full restart far less often
+            if count and count % DRIVER_RECYCLE_EVERY == 0:
+                log(f"Recycling browser after {count} users.")
+                driver = restart_driver(driver)
+            elif count and count % BROWSER_RESET_EVERY == 0:
+                log(f"Clearing browser state after {count} users.")
+                try:
+                    reset_browser_state(driver)
+                except WebDriverException as e:
+                    # The session died since the last user; a fresh browser has no state to clear
+                    log(f"Browser session failed ({e.msg}); restarting it.")
+                    driver = restart_driver(driver)
+            count += 1
+
+            log(f"--- Processing User {index + 1}: {name} ---")
+            try:
+                user_stat = analyze_profile(driver, rank, name, profile_url, bet_limit)
+            except WebDriverException as e:
+                # The session itself died (crashed tab, lost DevTools connection); retry once on a new one
+                log(f"Browser session failed ({e.msg}); restarting it.")
+                driver = restart_driver(driver)
+                try:
+                    user_stat = analyze_profile(driver, rank, name, profile_url, bet_limit)
+                except WebDriverException as e:
+                    # Nothing is written, so the next run picks this user up again
+                    log(f"Skipping {name} after repeated browser failure: {e.msg}")
+                    driver = restart_driver(driver)
+                    continue
+
+            write_user_stat(user_stat, writer, file, write_lock)
+    finally:
+        driver.quit()
+
+def api_worker(user_queue, bet_limit, writer, file, write_lock):
+    # One keep-alive HTTP session per worker, pulling users off the shared queue
+    with create_session() as session:
+        while True:
+            try:
+                index, rank, name, profile_url = user_queue.get_nowait()
+            except Empty:
+                return
+
+            log(f"--- Processing User {index + 1}: {name} ---")
+            user_stat = analyze_profile_api(session, rank, name, profile_url, bet_limit)
+            write_user_stat(user_stat, writer, file, write_lock)
+
+def scrape_users(users, bet_limit, output_path, workers=1, api=False):
+    # Both backends are blocking I/O (HTTP, or chromedriver), so threads are enough to keep
+    # several workers busy; they share one queue of users and one output writer
+    worker = api_worker if api else scrape_worker
+    user_queue = Queue()
+    for user in users:
+        user_queue.put(user)
+
+    file, writer = open_stats_writer(output_path)
+    write_lock = threading.Lock()
+    try:
+        if workers == 1:
+            worker(user_queue, bet_limit, writer, file, write_lock)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(worker, user_queue, bet_limit, writer, file, write_lock)
+                for _ in range(workers)
+            ]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    log(f"Worker failed: {e}")
+    finally:
+        file.close()
+
 def main():
     args = parse_arguments()
-    log(f"Starting analysis with User Limit: {args.user_limit}, Bet Limit: {args.bet_limit}")
+    log(f"Starting analysis with User Limit: {args.user_limit}, Bet Limit: {args.bet_limit}, Workers: {args.workers}")
     csv_input_path = resolve_csv_path(args.csv_file)
     csv_output_path = resolve_csv_path(args.output_file)
     
-    # Placeholder for main logic
     if not os.path.exists(csv_input_path):
         log(f"Error: CSV file '{csv_input_path}' not found.")
         return
 
     try:
-        df = pd.read_csv(csv_input_path)
+        df = pd.read_csv(
+            csv_input_path,
+            usecols=lambda column: column in ('Rank', 'Name', 'Profile URL'),
+            dtype={'Rank': 'Int32', 'Name': 'string', 'Profile URL': 'string'}
+        )
         log(f"Loaded {len(df)} users from {csv_input_path}")
     except Exception as e:
         log(f"Error reading CSV: {e}")
         return
 
+    users = []
+    # Plain tuples instead of iterrows(), which builds a Series per row
+    columns = df.reindex(columns=['Rank', 'Name', 'Profile URL'])
+    for index, rank, name, profile_url in columns.itertuples(index=True, name=None):
+        if pd.isna(profile_url) or not profile_url:
+            continue
+        users.append((
+            index,
+            None if pd.isna(rank) else int(rank),
+            'Unknown' if pd.isna(name) else name,
+            profile_url
+        ))
+    if args.user_limit:
+        users = users[:args.user_limit]
 
-    driver = setup_driver()
-    try:
-        count = 0
-        limit = args.user_limit
-        
-        all_stats = []
-        
-        # Iterate through users
-        first_write = True
-        for index, row in df.iterrows():
-            if limit and count >= limit:
-                break
-                
-            profile_url = row.get('Profile URL')
-            name = row.get('Name', 'Unknown')
-            if not profile_url or pd.isna(profile_url):
-                continue
-                
-            log(f"--- Processing User {index + 1}: {name} ---")
-            
-            user_stat = {
-                "Rank": row.get('Rank'),
-                "Name": name,
-                "Profile URL": profile_url,
-                "Wins": 0,
-                "Losses": 0,
-                "Total Won": 0.0,
-                "Total Lost": 0.0,
-                "Win Rate": 0.0,
-                "Duplicate Bets": 0,
-                "Hedged Bets": 0,
-                "Notes": ""
-            }
-            
-            if navigate_and_sort_bets(driver, profile_url):
-                 results = extract_and_analyze_bets(driver, args.bet_limit)
-                 if results:
-                     log(f"  Results for {name}:")
-                     log(f"  Wins: {results['wins']}, Losses: {results['losses']}")
-                     log(f"  Total Won: ${results['total_won']:.2f}, Total Lost: ${results['total_lost']:.2f}")
-                     
-                     user_stat["Wins"] = results['wins']
-                     user_stat["Losses"] = results['losses']
-                     user_stat["Total Won"] = results['total_won']
-                     user_stat["Total Lost"] = results['total_lost']
-                     
-                     total_bets = results['wins'] + results['losses']
-                     if total_bets > 0:
-                         user_stat["Win Rate"] = (results['wins'] / total_bets) * 100
-                     
-                     if results['duplicates']:
-                         log(f"  Found {len(results['duplicates'])} duplicate bet groups:")
-                         dup_count = sum(d['count'] - 1 for d in results['duplicates']) # Count of extra bets
-                         
-                         user_stat["Duplicate Bets"] = len(results['duplicates']) # Number of groups
-                         
-                         notes = []
-                         for dup in results['duplicates']:
-                             log(f"    - '{dup['title']}' ({dup['outcome']}) appeared {dup['count']} times")
-                             notes.append(f"{dup['title']}/{dup['outcome']} (x{dup['count']})")
-                         
-                         # Add hedging info to notes
-                         if results['hedged_markets']:
-                             log(f"  Found {len(results['hedged_markets'])} hedged markets:")
-                             for h in results['hedged_markets']:
-                                 log(f"    - '{h['title']}' with outcomes: {', '.join(h['outcomes'])}")
-                                 notes.append(f"HEDGED: {h['title']} ({', '.join(h['outcomes'])})")
-                                 
-                         user_stat["Hedged Bets"] = len(results['hedged_markets'])
-                         user_stat["Notes"] = "; ".join(notes)
-                 else:
-                     log("  No results found.")
-            else:
-                user_stat["Notes"] = "Navigation/Sort Error"
+    # Resume: skip users already scraped by a previous run
+    done = set() if args.rescan else load_scraped_urls([csv_output_path], args.api)
+    if done:
+        pending = [user for user in users if user[3] not in done]
+        log(f"Skipping {len(users) - len(pending)} users already in {csv_output_path}")
+        users = pending
 
-            all_stats.append(user_stat)
+    if users:
+        if not args.api:
+            # Resolve the driver once up front so workers don't race to download it
+            get_driver_path()
+        scrape_users(users, args.bet_limit, csv_output_path, max(1, min(args.workers, len(users))), args.api)
 
-            # Save incrementally
-            try:
-                os.makedirs(CSV_DIR, exist_ok=True)
-                mode = 'w' if first_write else 'a'
-                pd.DataFrame([user_stat]).to_csv(csv_output_path, mode=mode, header=first_write, index=False)
-                first_write = False
-            except Exception as e:
-                log(f"Error saving incremental CSV: {e}")
+    compact_stats(csv_output_path)
 
-            count += 1
-            
-        log(f"Analysis complete. Statistics saved to {csv_output_path}")
-            
-    finally:
-        driver.quit()
+    log(f"Analysis complete. Statistics saved to {csv_output_path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,20 @@
+import os
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.driver_cache import DriverCacheManager
+
+# chromedriver lookup shared by the profile scraper (analyze_user.py) and the social scanners
+
+# Resolved once per process; see get_driver_path()
+_driver_path = None
+
+def get_driver_path():
+    # Prefer an explicit CHROMEDRIVER binary, otherwise let webdriver_manager resolve it once
+    # and trust its on-disk cache for 30 days instead of re-checking versions on every run.
+    global _driver_path
+    if _driver_path is None:
+        cached = os.environ.get("CHROMEDRIVER")
+        if cached and os.path.exists(cached):
+            _driver_path = cached
+        else:
+            _driver_path = ChromeDriverManager(cache_manager=DriverCacheManager(valid_range=30)).install()
+    return _driver_path
@@ -1,12 +1,16 @@
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+from polymarket_api import GAMMA_API_URL, create_session
 
 # Base URL for Polymarket's Official Data API
-BASE_URL = "https://gamma-api.polymarket.com"
+BASE_URL = GAMMA_API_URL
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 CSV_DIR = os.path.join(BASE_DIR, "csv")
 
+# Shared keep-alive connection pool for all Gamma calls
+session = create_session()
+
 def get_top_markets():
     # Fetch top active markets by volume
     url = f"{BASE_URL}/markets"
@@ -19,7 +23,7 @@ def get_top_markets():
     }
     
     try:
-        response = requests.get(url, params=params)
+        response = session.get(url, params=params)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -38,7 +42,7 @@ def get_recent_trades(market_id):
     }
     
     try:
-        response = requests.get(url, params=params)
+        response = session.get(url, params=params)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -53,12 +57,14 @@ user_set = set()
 data = []
 
 if markets:
-    # Look at the top 3 markets to harvest user addresses
-    for market in markets[:3]: 
+    # Look at the top 3 markets to harvest user addresses, fetching their trades concurrently
+    # on the shared session; map() keeps the markets in volume order
+    top_markets = markets[:3]
+    with ThreadPoolExecutor(max_workers=len(top_markets)) as executor:
+        market_trades = list(executor.map(lambda market: get_recent_trades(market.get('id')), top_markets))
+
+    for market, trades in zip(top_markets, market_trades):
         print(f"Scanning market: {market.get('question', 'Unknown')}")
-        market_id = market.get('id')
-        
-        trades = get_recent_trades(market_id)
         for trade in trades:
             # The 'maker' or 'taker' is the user address
             user = trade.get('taker_address') # Taker is usually the active bettor
@@ -1,13 +1,25 @@
 import requests
 import csv
-import time
+from concurrent.futures import ThreadPoolExecutor
 import os
+from polymarket_api import DATA_API_URL, create_session
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 CSV_DIR = os.path.join(BASE_DIR, "csv")
 
+def fetch_page(session, base_url, params, page):
+    offset = page * params["limit"]
+    try:
+        print(f"Fetching page {page + 1} (offset {offset})...")
+        response = session.get(base_url, params={**params, "offset": offset})
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching page {page + 1}: {e}")
+        return None
+
 def scrape_polymarket_leaderboard():
-    base_url = "https://data-api.polymarket.com/v1/leaderboard"
+    base_url = f"{DATA_API_URL}/v1/leaderboard"
     output_file = os.path.join(CSV_DIR, "polymarket_leaderboard_monthly.csv")
     
     # Parameters for the request
@@ -17,64 +29,65 @@ def scrape_polymarket_leaderboard():
         "limit": 20,
         "category": "overall"
     }
+    pages = 10
 
-    all_users = []
+    user_count = 0
+    session = create_session()
     
     print("Starting scrape of Polymarket monthly leaderboard (Top 200)...")
 
-    # Iterate through 10 pages (20 items per page * 10 = 200 items)
-    for page in range(10):
-        offset = page * 20
-        params["offset"] = offset
-        
-        try:
-            print(f"Fetching page {page + 1} (offset {offset})...")
-            response = requests.get(base_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if not data:
-                print("No more data found.")
-                break
-                
-            for user in data:
-                rank = user.get('rank', 'N/A')
-                wallet_address = user.get('proxyWallet', '')
-                
-                # Use username if available, otherwise fallback to wallet address (or part of it)
-                display_name = user.get('userName')
-                if not display_name:
-                    display_name = wallet_address
-                
-                profile_url = ""
-                if wallet_address:
-                    profile_url = f"https://polymarket.com/profile/{wallet_address}"
+    # Rows are written page by page into a temporary file that only replaces the
+    # previous leaderboard once at least one user was scraped
+    os.makedirs(CSV_DIR, exist_ok=True)
+    tmp_file = f"{output_file}.tmp"
+    with open(tmp_file, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=["Rank", "Name", "Profile URL"])
+        writer.writeheader()
+
+        # Fetch all 10 pages concurrently (20 items per page * 10 = 200 items); map() keeps page
+        # order, so the first empty or failed page still ends the leaderboard as before
+        with ThreadPoolExecutor(max_workers=pages) as executor:
+            results = executor.map(lambda page: fetch_page(session, base_url, params, page), range(pages))
+
+            for data in results:
+                if data is None:
+                    break
                 
-                all_users.append({
-                    "Rank": rank,
-                    "Name": display_name,
-                    "Profile URL": profile_url
-                })
-            
-            # Be nice to the API
-            time.sleep(0.5)
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching page {page + 1}: {e}")
-            break
+                if not data:
+                    print("No more data found.")
+                    break
+                    
+                page_users = []
+                for user in data:
+                    rank = user.get('rank', 'N/A')
+                    wallet_address = user.get('proxyWallet', '')
+                    
+                    # Use username if available, otherwise fallback to wallet address (or part of it)
+                    display_name = user.get('userName')
+                    if not display_name:
+                        display_name = wallet_address
+                    
+                    profile_url = ""
+                    if wallet_address:
+                        profile_url = f"https://polymarket.com/profile/{wallet_address}"
+                    
+                    page_users.append({
+                        "Rank": rank,
+                        "Name": display_name,
+                        "Profile URL": profile_url
+                    })
+
+                writer.writerows(page_users)
+                file.flush()
+                user_count += len(page_users)
 
     # Save to CSV
-    if all_users:
-        os.makedirs(CSV_DIR, exist_ok=True)
-        with open(output_file, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=["Rank", "Name", "Profile URL"])
-            writer.writeheader()
-            writer.writerows(all_users)
-        
-        print(f"\nSuccessfully scraped {len(all_users)} users.")
+    if user_count:
+        os.replace(tmp_file, output_file)
+        print(f"\nSuccessfully scraped {user_count} users.")
         print(f"Data saved to {os.path.abspath(output_file)}")
     else:
+        os.remove(tmp_file)
         print("No users scraped.")
 
 if __name__ == "__main__":
@@ -1,16 +1,13 @@
 import os
-import time
-import csv
-import pandas as pd
+import re
 from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
 from google import genai
+from scanner_base import chrome_options, start_driver, scroll_feed, keep_validated, save_posts
 
 # Load environment variables
 load_dotenv()
@@ -24,16 +21,48 @@ if not all([LINKEDIN_USERNAME, LINKEDIN_PASSWORD, GEMINI_API_KEY]):
 
 # Configure Gemini
 client = genai.Client(api_key=GEMINI_API_KEY)
+GEMINI_CRITERION = "It mentions a win rate, success rate, or similar metric that is greater than 80%."
+
+# Posts worth sending to Gemini mention one of these ("rate" also covers win/success rate)
+KEYWORD_PATTERN = re.compile(r"80%|rate|profit", re.IGNORECASE)
+
+# Feed selectors (these change with LinkedIn's markup, so keep them in one place)
+FEED_ITEM_SEL = "div.feed-shared-update-v2"
+POST_TEXT_SEL = "div.update-components-text span.break-words"
+POST_AUTHOR_SEL = "span.update-components-actor__name span[aria-hidden='true']"
+POST_LINK_SEL = "a.update-components-actor__sub-description"
+POST_LINK_FALLBACK_SEL = "a.app-aware-link"
+
+# Author, text and post link of every feed item. The timestamp/date is usually a link to the
+# post; when it has no href, fall back to the first app link in the item.
+EXTRACT_POSTS_JS = """
+const [itemSel, textSel, authorSel, linkSel, fallbackSel] = arguments;
+return Array.from(document.querySelectorAll(itemSel), item => {
+    const text = item.querySelector(textSel);
+    const author = item.querySelector(authorSel);
+    const link = item.querySelector(linkSel) || {};
+    const fallback = item.querySelector(fallbackSel) || {};
+    return {
+        author: author ? author.innerText : "Unknown",
+        text: text ? text.innerText : "",
+        url: link.href || fallback.href || "Unknown"
+    };
+});
+"""
 
 def setup_driver():
-    options = webdriver.ChromeOptions()
-    # options.add_argument("--headless")  # Uncomment to run in headless mode
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    return driver
+    return start_driver(chrome_options("chrome_linkedin"))
 
 def login_linkedin(driver):
+    # The persistent profile is usually still signed in; only log in when the feed redirects away
+    driver.get("https://www.linkedin.com/feed/")
+    try:
+        WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.ID, "global-nav-search")))
+        print("Already logged in.")
+        return
+    except TimeoutException:
+        pass
+
     print("Logging into LinkedIn...")
     driver.get("https://www.linkedin.com/login")
     
@@ -70,112 +99,26 @@ def search_polymarket_posts(driver):
 
     search_url = base_url + date_selection + "&" + keywords_selection + "&" + extra_selection
     driver.get(search_url)
-    time.sleep(5)  # Allow initial load
-
-def scroll_feed(driver, num_scrolls=5):
-    print(f"Scrolling feed {num_scrolls} times...")
-    body = driver.find_element(By.TAG_NAME, "body")
-    for _ in range(num_scrolls):
-        body.send_keys(Keys.END)
-        time.sleep(3)  # Wait for content to load
+    # Allow initial load: wait for the first result instead of a fixed 5 s
+    try:
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, FEED_ITEM_SEL)))
+    except TimeoutException:
+        print("No results rendered yet.")
 
 def extract_posts(driver):
     print("Extracting posts...")
-    posts_data = []
-    
-    # Locate post containers (selectors might change, these are common LinkedIn selectors)
-    # Using a broad selector and then narrowing down
-    post_elements = driver.find_elements(By.CSS_SELECTOR, "div.update-components-text")
-    
-    # We need to find the parent container to get author and link
-    # This part is tricky as LinkedIn structure is complex and dynamic.
-    # A more robust way is to find the main feed list items.
-    
-    # Alternative strategy: Find all feed items
-    feed_items = driver.find_elements(By.CSS_SELECTOR, "div.feed-shared-update-v2")
-    
+    # Read every feed item in one script call instead of several driver round-trips per item
+    feed_items = driver.execute_script(EXTRACT_POSTS_JS, FEED_ITEM_SEL, POST_TEXT_SEL, POST_AUTHOR_SEL, POST_LINK_SEL, POST_LINK_FALLBACK_SEL)
     print(f"Found {len(feed_items)} potential posts.")
-    
-    for item in feed_items:
-        try:
-            # Extract Text
-            try:
-                text_element = item.find_element(By.CSS_SELECTOR, "div.update-components-text span.break-words")
-                text = text_element.text
-            except:
-                text = ""
-            
-            if not text:
-                continue
-
-            # Extract Author
-            try:
-                author_element = item.find_element(By.CSS_SELECTOR, "span.update-components-actor__name span[aria-hidden='true']")
-                author = author_element.text
-            except:
-                author = "Unknown"
-
-            # Extract Post Link
-            # Usually found in the '...' menu or by clicking 'copy link', but sometimes the date is a link
-            try:
-                # The timestamp/date is usually a link to the post
-                link_element = item.find_element(By.CSS_SELECTOR, "a.update-components-actor__sub-description")
-                # Or sometimes class update-components-actor__meta-link
-                if not link_element.get_attribute("href"):
-                     link_element = item.find_element(By.CSS_SELECTOR, "a.app-aware-link") # Fallback
-                
-                post_url = link_element.get_attribute("href")
-            except:
-                post_url = "Unknown"
-
-            posts_data.append({
-                "author": author,
-                "text": text,
-                "url": post_url
-            })
-            
-        except Exception as e:
-            # print(f"Error parsing a post: {e}")
-            continue
-            
-    return posts_data
+    return [post for post in feed_items if post['text']]
 
 def filter_with_keywords(posts):
     print("Filtering by keywords...")
-    filtered = []
-    keywords = ["80%", "rate", "win rate", "success rate", "profit"]
-    
-    for post in posts:
-        text_lower = post['text'].lower()
-        if any(keyword in text_lower for keyword in keywords):
-            filtered.append(post)
+    filtered = [post for post in posts if KEYWORD_PATTERN.search(post['text'])]
             
     print(f"Retained {len(filtered)} posts after keyword filtering.")
     return filtered
 
-def validate_with_gemini(post_text):
-    prompt = f"""
-    Analyze the following LinkedIn post and determine if it meets these criteria:
-    1. It is related to a Polymarket user or trader.
-    2. It mentions a win rate, success rate, or similar metric that is greater than 80%.
-
-    Post Text:
-    "{post_text}"
-
-    Respond with ONLY "TRUE" if it meets both criteria, or "FALSE" if it does not.
-    """
-    
-    try:
-        response = client.models.generate_content(
-            model='	gemini-3-flash-preview', 
-            contents=prompt
-        )
-        result = response.text.strip().upper()
-        return "TRUE" in result
-    except Exception as e:
-        print(f"Gemini API error: {e}")
-        return False
-
 def main():
     driver = setup_driver()
     try:
@@ -186,27 +129,8 @@ def main():
         raw_posts = extract_posts(driver)
         keyword_filtered_posts = filter_with_keywords(raw_posts)
         
-        final_posts = []
-        print("Validating with Gemini...")
-        for post in keyword_filtered_posts:
-            if validate_with_gemini(post['text']):
-                print(f"Found match: {post['author']}")
-                final_posts.append(post)
-            else:
-                # print(f"Rejected by Gemini: {post['text'][:50]}...")
-                pass
-        
-        # Save to CSV
-        if final_posts:
-            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-            csv_dir = os.path.join(base_dir, "csv")
-            os.makedirs(csv_dir, exist_ok=True)
-            output_file = os.path.join(csv_dir, "polymarket_high_rate_posts.csv")
-            df = pd.DataFrame(final_posts)
-            df.to_csv(output_file, index=False)
-            print(f"Saved {len(final_posts)} posts to {output_file}")
-        else:
-            print("No matching posts found.")
+        final_posts = keep_validated(client, keyword_filtered_posts, "LinkedIn", GEMINI_CRITERION, "gemini_linkedin")
+        save_posts(final_posts, "polymarket_high_rate_posts.csv")
             
     except Exception as e:
         print(f"An error occurred: {e}")
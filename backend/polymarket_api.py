@@ -0,0 +1,54 @@
+import socket
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+# Polymarket's public read-only APIs (no key required)
+DATA_API_URL = "https://data-api.polymarket.com"
+GAMMA_API_URL = "https://gamma-api.polymarket.com"
+
+# closed-positions is the JSON behind a profile's "Closed" tab
+CLOSED_POSITIONS_PAGE_SIZE = 50  # Largest page the endpoint serves
+
+# TCP keep-alive probes on pooled sockets, so NAT/load balancers don't silently drop
+# connections left idle between users during long runs (idle 30s, then every 10s, 3 tries)
+KEEPALIVE_OPTIONS = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)] + [
+    (socket.IPPROTO_TCP, getattr(socket, name), value)
+    for name, value in [("TCP_KEEPIDLE", 30), ("TCP_KEEPINTVL", 10), ("TCP_KEEPCNT", 3)]
+    if hasattr(socket, name)  # Not every platform exposes the tuning knobs
+]
+
+class KeepAliveAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        # socket_options replaces urllib3's defaults (TCP_NODELAY), so keep them
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + KEEPALIVE_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+def create_session():
+    # One keep-alive connection pool for every page; throttling and transient gateway
+    # errors are retried with backoff (honouring Retry-After) instead of a fixed sleep
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+    session.mount("https://", KeepAliveAdapter(pool_connections=20, pool_maxsize=20, max_retries=retries))
+    return session
+
+def fetch_closed_positions(session, wallet, bet_limit):
+    # Newest first, like the "Date" sort the browser scraper applies, paged until a short page
+    positions = []
+    offset = 0
+    while not bet_limit or len(positions) < bet_limit:
+        response = session.get(f"{DATA_API_URL}/closed-positions", params={
+            "user": wallet,
+            "limit": CLOSED_POSITIONS_PAGE_SIZE,
+            "offset": offset,
+            "sortBy": "TIMESTAMP",
+            "sortDirection": "DESC"
+        }, timeout=15)
+        response.raise_for_status()
+        page = response.json()
+        positions.extend(page)
+        if len(page) < CLOSED_POSITIONS_PAGE_SIZE:
+            break
+        offset += CLOSED_POSITIONS_PAGE_SIZE
+    return positions[:bet_limit] if bet_limit else positions
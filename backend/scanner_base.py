@@ -0,0 +1,142 @@
+import os
+import re
+import json
+import shelve
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from chrome_driver import get_driver_path
+
+# Shared scaffolding for the social scanners (linkedin_scanner.py, twitter_scanner.py):
+# browser setup, feed scrolling, batched Gemini validation and saving the matches
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CSV_DIR = os.path.join(BASE_DIR, "csv")
+# Browser profiles and Gemini verdicts kept between runs
+CACHE_DIR = os.path.join(BASE_DIR, ".cache")
+
+GEMINI_MODEL = 'gemini-3-flash-preview'
+# Posts per Gemini request; larger prompts answer slower and are more likely to miscount
+GEMINI_BATCH_SIZE = 20
+# Concurrent Gemini requests, kept under the API's per-minute rate limit
+GEMINI_WORKERS = 8
+
+def chrome_options(profile_name):
+    options = webdriver.ChromeOptions()
+    # options.add_argument("--headless")  # Uncomment to run in headless mode
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    # Persistent profile so the site's session cookies survive between runs
+    options.add_argument(f"--user-data-dir={os.path.join(CACHE_DIR, profile_name)}")
+    return options
+
+def start_driver(options):
+    return webdriver.Chrome(service=Service(get_driver_path()), options=options)
+
+def scroll_feed(driver, num_scrolls=5, max_wait=3):
+    print(f"Scrolling feed {num_scrolls} times...")
+    body = driver.find_element(By.TAG_NAME, "body")
+    for _ in range(num_scrolls):
+        height = driver.execute_script("return document.body.scrollHeight")
+        body.send_keys(Keys.END)
+        # Continue as soon as more content has loaded, waiting at most max_wait seconds
+        try:
+            WebDriverWait(driver, max_wait, poll_frequency=0.2).until(
+                lambda d: d.execute_script("return document.body.scrollHeight") > height
+            )
+        except TimeoutException:
+            pass
+
+def validate_batch_with_gemini(client, post_texts, site, criterion, cache_name):
+    # Verdicts are cached on disk by text hash, so reposts and texts seen on earlier runs
+    # never reach Gemini again; only distinct unseen texts are sent
+    keys = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in post_texts]
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with shelve.open(os.path.join(CACHE_DIR, cache_name)) as cache:
+        texts = {key: text for key, text in zip(keys, post_texts) if key not in cache}
+        pending = list(texts)
+        print(f"{len(post_texts) - len(pending)} posts already validated (cached or repeated).")
+
+        # One Gemini request per GEMINI_BATCH_SIZE posts instead of one per post, with the
+        # requests in flight concurrently; map() returns the chunks in post order
+        chunks = [pending[start:start + GEMINI_BATCH_SIZE] for start in range(0, len(pending), GEMINI_BATCH_SIZE)]
+        results = {}
+        chunk_texts = [[texts[key] for key in chunk] for chunk in chunks]
+        with ThreadPoolExecutor(max_workers=GEMINI_WORKERS) as executor:
+            chunk_verdicts = executor.map(lambda batch: validate_chunk_with_gemini(client, batch, site, criterion), chunk_texts)
+            for chunk, verdicts in zip(chunks, chunk_verdicts):
+                if verdicts is None:
+                    # Failed batches are rejected for this run only, not remembered
+                    results.update((key, False) for key in chunk)
+                    continue
+                for key, verdict in zip(chunk, verdicts):
+                    cache[key] = results[key] = verdict
+
+        return [results[key] if key in results else cache[key] for key in keys]
+
+def validate_chunk_with_gemini(client, post_texts, site, criterion):
+    posts = "\n\n".join(f'Post {i}:\n"{text}"' for i, text in enumerate(post_texts, 1))
+    prompt = f"""
+    Analyze each of the following {site} posts and determine if it meets these criteria:
+    1. It is related to a Polymarket user or trader.
+    2. {criterion}
+
+    {posts}
+
+    Respond with ONLY a JSON array of {len(post_texts)} booleans, one per post in order:
+    true if the post meets both criteria, or false if it does not.
+    """
+
+    try:
+        response = client.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=prompt
+        )
+        return parse_gemini_verdicts(response.text, len(post_texts))
+    except Exception as e:
+        print(f"Gemini API error: {e}")
+        return None
+
+def parse_gemini_verdicts(text, count):
+    # Prefer the JSON array; fall back to one TRUE/FALSE per line. A reply that doesn't
+    # cover every post can't be lined up with the posts, so the whole batch fails (None).
+    match = re.search(r"\[.*\]", text, re.DOTALL)
+    if match:
+        try:
+            verdicts = json.loads(match.group(0).lower())
+            if len(verdicts) == count:
+                return [verdict is True for verdict in verdicts]
+        except ValueError:
+            pass
+    verdicts = re.findall(r"\b(TRUE|FALSE)\b", text.upper())
+    if len(verdicts) == count:
+        return [verdict == "TRUE" for verdict in verdicts]
+    print(f"Gemini returned {len(verdicts)} verdicts for {count} posts; skipping batch.")
+    return None
+
+def keep_validated(client, posts, site, criterion, cache_name):
+    print("Validating with Gemini...")
+    final_posts = []
+    verdicts = validate_batch_with_gemini(client, [post['text'] for post in posts], site, criterion, cache_name)
+    for post, verdict in zip(posts, verdicts):
+        if verdict:
+            print(f"Found match: {post['author']}")
+            final_posts.append(post)
+    return final_posts
+
+def save_posts(posts, filename):
+    # Save to CSV
+    if posts:
+        os.makedirs(CSV_DIR, exist_ok=True)
+        output_file = os.path.join(CSV_DIR, filename)
+        df = pd.DataFrame(posts)
+        df.to_csv(output_file, index=False)
+        print(f"Saved {len(posts)} posts to {output_file}")
+    else:
+        print("No matching posts found.")
@@ -1,15 +1,13 @@
 import os
-import time
-import pandas as pd
+import re
 from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
 from google import genai
+from scanner_base import chrome_options, start_driver, scroll_feed, keep_validated, save_posts
 
 # Load environment variables
 load_dotenv()
@@ -24,17 +22,38 @@ if not all([TWITTER_USERNAME, TWITTER_PASSWORD, GEMINI_API_KEY]):
 
 # Configure Gemini
 client = genai.Client(api_key=GEMINI_API_KEY)
+GEMINI_CRITERION = "It mentions a win rate, success rate, or similar metric that is greater than 80% (or implies a very high success rate)."
+
+# Keywords for the backup filter after the search query
+KEYWORD_PATTERN = re.compile(r"80%|rate|win|profit", re.IGNORECASE)
+
+# Search timeline selectors (these change with X's markup, so keep them in one place)
+TWEET_SEL = "article[data-testid='tweet']"
+TWEET_TEXT_SEL = "div[data-testid='tweetText']"
+TWEET_AUTHOR_SEL = "div[data-testid='User-Name']"
+
+# Author, text and status link of every tweet; the time element's parent links to the status
+EXTRACT_TWEETS_JS = """
+const [tweetSel, textSel, authorSel] = arguments;
+return Array.from(document.querySelectorAll(tweetSel), article => {
+    const text = article.querySelector(textSel);
+    const author = article.querySelector(authorSel);
+    const time = article.querySelector("time");
+    return {
+        author: author ? author.innerText.replace(/\\n/g, " ") : "Unknown",
+        text: text ? text.innerText : "",
+        url: (time && time.parentElement.href) || "Unknown"
+    };
+});
+"""
 
 def setup_driver():
-    options = webdriver.ChromeOptions()
-    # options.add_argument("--headless")  # Uncomment to run in headless mode
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
+    options = chrome_options("chrome_twitter")
     options.add_argument("--disable-blink-features=AutomationControlled") # Reduce detection
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option("useAutomationExtension", False)
     
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    driver = start_driver(options)
     
     # Stealth settings
     driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
@@ -48,6 +67,17 @@ def setup_driver():
     return driver
 
 def login_twitter(driver):
+    # The persistent profile is usually still signed in; only log in when home redirects away
+    driver.get("https://x.com/home")
+    try:
+        WebDriverWait(driver, 5).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='AppTabBar_Home_Link']"))
+        )
+        print("Already logged in.")
+        return
+    except TimeoutException:
+        pass
+
     print("Logging into Twitter...")
     driver.get("https://x.com/i/flow/login")
     
@@ -96,122 +126,34 @@ def search_twitter(driver):
     search_url = f"https://x.com/search?q={encoded_query}&src=typed_query&f=live" # f=live for latest
     
     driver.get(search_url)
-    time.sleep(5)  # Allow initial load
-
-def scroll_feed(driver, num_scrolls=5):
-    print(f"Scrolling feed {num_scrolls} times...")
-    body = driver.find_element(By.TAG_NAME, "body")
-    for _ in range(num_scrolls):
-        body.send_keys(Keys.END)
-        time.sleep(4)  # Wait for content to load (Twitter can be slower)
+    # Allow initial load: wait for the first result instead of a fixed 5 s
+    try:
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, TWEET_SEL)))
+    except TimeoutException:
+        print("No results rendered yet.")
 
 def extract_tweets(driver):
     print("Extracting tweets...")
-    tweets_data = []
-    
-    # Find all tweet articles
-    articles = driver.find_elements(By.CSS_SELECTOR, "article[data-testid='tweet']")
+    # Read every tweet article in one script call instead of several driver round-trips per tweet
+    articles = driver.execute_script(EXTRACT_TWEETS_JS, TWEET_SEL, TWEET_TEXT_SEL, TWEET_AUTHOR_SEL)
     print(f"Found {len(articles)} potential tweets.")
-    
-    for article in articles:
-        try:
-            # Extract Text
-            try:
-                text_element = article.find_element(By.CSS_SELECTOR, "div[data-testid='tweetText']")
-                text = text_element.text
-            except:
-                text = ""
-            
-            if not text:
-                continue
-
-            # Extract Author
-            try:
-                user_element = article.find_element(By.CSS_SELECTOR, "div[data-testid='User-Name']")
-                author = user_element.text.replace("\n", " ")
-            except:
-                author = "Unknown"
-
-            # Extract Link
-            try:
-                # The time element usually links to the status
-                time_element = article.find_element(By.TAG_NAME, "time")
-                link_element = time_element.find_element(By.XPATH, "..")
-                post_url = link_element.get_attribute("href")
-            except:
-                post_url = "Unknown"
-
-            tweets_data.append({
-                "author": author,
-                "text": text,
-                "url": post_url
-            })
-            
-        except Exception as e:
-            continue
-            
-    return tweets_data
-
-def validate_with_gemini(post_text):
-    prompt = f"""
-    Analyze the following Twitter post and determine if it meets these criteria:
-    1. It is related to a Polymarket user or trader.
-    2. It mentions a win rate, success rate, or similar metric that is greater than 80% (or implies a very high success rate).
-
-    Post Text:
-    "{post_text}"
-
-    Respond with ONLY "TRUE" if it meets both criteria, or "FALSE" if it does not.
-    """
-    
-    try:
-        response = client.models.generate_content(
-            model='gemini-3-flash-preview', 
-            contents=prompt
-        )
-        result = response.text.strip().upper()
-        return "TRUE" in result
-    except Exception as e:
-        print(f"Gemini API error: {e}")
-        return False
+    return [tweet for tweet in articles if tweet['text']]
 
 def main():
     driver = setup_driver()
     try:
         login_twitter(driver)
         search_twitter(driver)
-        scroll_feed(driver, num_scrolls=8)
+        scroll_feed(driver, num_scrolls=8, max_wait=4) # Twitter can be slower
         
         raw_tweets = extract_tweets(driver)
         
         # Additional keyword filtering (optional since we used search query, but good as backup)
-        keywords = ["80%", "rate", "win", "profit"]
-        keyword_filtered = [
-            p for p in raw_tweets 
-            if any(k in p['text'].lower() for k in keywords)
-        ]
+        keyword_filtered = [p for p in raw_tweets if KEYWORD_PATTERN.search(p['text'])]
         print(f"Retained {len(keyword_filtered)} tweets after initial filtering.")
         
-        final_posts = []
-        print("Validating with Gemini...")
-        for post in keyword_filtered:
-            if validate_with_gemini(post['text']):
-                print(f"Found match: {post['author']}")
-                final_posts.append(post)
-            else:
-                pass
-        
-        # Save to CSV
-        if final_posts:
-            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-            csv_dir = os.path.join(base_dir, "csv")
-            os.makedirs(csv_dir, exist_ok=True)
-            output_file = os.path.join(csv_dir, "twitter_high_rate_posts.csv")
-            df = pd.DataFrame(final_posts)
-            df.to_csv(output_file, index=False)
-            print(f"Saved {len(final_posts)} posts to {output_file}")
-        else:
-            print("No matching posts found.")
+        final_posts = keep_validated(client, keyword_filtered, "Twitter", GEMINI_CRITERION, "gemini_twitter")
+        save_posts(final_posts, "twitter_high_rate_posts.csv")
             
     except Exception as e:
         print(f"An error occurred: {e}")
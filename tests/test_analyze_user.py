@@ -0,0 +1,129 @@
+import csv
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from analyze_user import API_ERROR_NOTE, API_ROW_NOTE, NAVIGATION_ERROR_NOTE, compact_stats, load_scraped_urls, open_stats_writer, parse_bet_rows, position_rows, summarize_bets
+
+def test_parse_bet_rows_extracts_fields():
+    """Won/Lost rows are parsed, unsettled rows are skipped."""
+    texts = [
+        "Lakers vs. Celtics\nWon 1,250.50 Lakers at 45¢",
+        "Fed cuts rates?\nLost 300 Yes at 62¢",
+        "Open position\nPending",
+    ]
+    assert parse_bet_rows(texts) == [
+        ("Lakers vs. Celtics", "Won", "Lakers", 1250.5),
+        ("Fed cuts rates?", "Lost", "Yes", 300.0),
+    ]
+
+def test_parse_bet_rows_status_comes_from_bet_line():
+    """A title mentioning "Won" does not turn a lost bet into a win."""
+    rows = parse_bet_rows(["Who Won the debate?\nLost 40 Harris at 51¢"])
+    assert rows == [("Who Won the debate?", "Lost", "Harris", 40.0)]
+
+def test_parse_bet_rows_fields_on_separate_lines():
+    """The bet line may be split across lines by the row layout."""
+    rows = parse_bet_rows(["Spread: 49ers (-2.5)\nWon\n75\n49ers\n(-2.5)\nat 50¢"])
+    assert rows == [("Spread: 49ers (-2.5)", "Won", "49ers (-2.5)", 75.0)]
+
+def test_position_rows_classify_by_realized_pnl():
+    """Closed positions become the same rows the page parser produces; break-even ones are skipped."""
+    positions = [
+        {"title": "Lakers vs. Celtics", "outcome": "Lakers", "realizedPnl": 1250.5},
+        {"title": "Fed cuts rates?", "outcome": "Yes", "realizedPnl": -300},
+        {"title": "Fed cuts rates?", "outcome": "No", "realizedPnl": None},
+        {"title": "Rain tomorrow?", "outcome": "No", "realizedPnl": 0},
+    ]
+    assert position_rows(positions) == [
+        ("Lakers vs. Celtics", "Won", "Lakers", 1250.5),
+        ("Fed cuts rates?", "Lost", "Yes", 300.0),
+    ]
+
+def test_summarize_bets_counts_duplicates_and_hedges():
+    """Totals, duplicate groups and hedged markets come out of one summary."""
+    rows = [
+        ("Market A", "Won", "Yes", 100.0),
+        ("Market A", "Won", "Yes", 50.0),
+        ("Market A", "Lost", "No", 20.0),
+        ("Market B", "Lost", "No", 10.0),
+    ]
+    results = summarize_bets(rows)
+    assert results["wins"] == 2
+    assert results["losses"] == 2
+    assert results["total_won"] == 150.0
+    assert results["total_lost"] == 30.0
+    assert [(d["title"], d["outcome"], d["count"]) for d in results["duplicates"]] == [("Market A", "Yes", 2)]
+    assert results["hedged_markets"] == [{"title": "Market A", "outcomes": ["Yes", "No"]}]
+
+def test_summarize_bets_empty():
+    """A profile without settled bets summarizes to zeros."""
+    results = summarize_bets([])
+    assert results["wins"] == 0 and results["losses"] == 0
+    assert results["duplicates"] == [] and results["hedged_markets"] == []
+
+def test_stats_writer_appends_and_resumes(tmp_path):
+    """Rows written by one run are skipped by the next, and the header is written once."""
+    path = str(tmp_path / "stats.csv")
+    for url in ["https://polymarket.com/profile/0xa", "https://polymarket.com/profile/0xb"]:
+        file, writer = open_stats_writer(path)
+        writer.writerow({"Name": "user", "Profile URL": url})
+        file.close()
+
+    assert load_scraped_urls([path, str(tmp_path / "missing.csv")]) == {
+        "https://polymarket.com/profile/0xa",
+        "https://polymarket.com/profile/0xb",
+    }
+    with open(path) as f:
+        assert f.read().count("Profile URL") == 1
+
+def test_failed_users_are_not_cached(tmp_path):
+    """Users whose profile or closed positions failed to load are retried on the next run."""
+    path = str(tmp_path / "stats.csv")
+    file, writer = open_stats_writer(path)
+    writer.writerow({"Profile URL": "https://polymarket.com/profile/0xa"})
+    writer.writerow({"Profile URL": "https://polymarket.com/profile/0xb", "Notes": NAVIGATION_ERROR_NOTE})
+    writer.writerow({"Profile URL": "https://polymarket.com/profile/0xc", "Notes": API_ERROR_NOTE})
+    file.close()
+
+    assert load_scraped_urls([path]) == {"https://polymarket.com/profile/0xa"}
+
+def test_resume_only_counts_rows_from_the_same_mode(tmp_path):
+    """Rows read with --api are rescanned by a browser run, and the other way round."""
+    path = str(tmp_path / "stats.csv")
+    file, writer = open_stats_writer(path)
+    writer.writerow({"Profile URL": "0xa", "Notes": "HEDGED: Market A (Yes, No)"})
+    writer.writerow({"Profile URL": "0xb", "Notes": API_ROW_NOTE})
+    writer.writerow({"Profile URL": "0xc", "Notes": f"{API_ROW_NOTE}; HEDGED: Market B (Yes, No)"})
+    file.close()
+
+    assert load_scraped_urls([path]) == {"0xa"}
+    assert load_scraped_urls([path], api=True) == {"0xb", "0xc"}
+
+def test_compact_stats_keeps_newest_row_per_user(tmp_path):
+    """Rescanned users keep only their latest row, in the position of that row."""
+    output = str(tmp_path / "stats.csv")
+    file, writer = open_stats_writer(output)
+    for url, wins in [("0xa", "1"), ("0xb", "2"), ("0xa", "5"), ("0xc", "3")]:
+        writer.writerow({"Profile URL": url, "Wins": wins})
+    file.close()
+
+    compact_stats(output)
+
+    with open(output, newline='') as f:
+        rows = [(row["Profile URL"], row["Wins"]) for row in csv.DictReader(f)]
+    assert rows == [("0xb", "2"), ("0xa", "5"), ("0xc", "3")]
+
+def test_compact_stats_restores_rank_order(tmp_path):
+    """Rows written in completion order are put back in rank order, float ranks included."""
+    output = str(tmp_path / "stats.csv")
+    file, writer = open_stats_writer(output)
+    for rank, url in [("3", "0xc"), (None, "0xd"), ("1.0", "0xa"), ("n/a", "0xe"), ("10", "0xj"), ("2.0", "0xb")]:
+        writer.writerow({"Rank": rank, "Profile URL": url})
+    file.close()
+
+    compact_stats(output)
+
+    with open(output, newline='') as f:
+        assert [row["Profile URL"] for row in csv.DictReader(f)] == ["0xa", "0xb", "0xc", "0xj", "0xd", "0xe"]
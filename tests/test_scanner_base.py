@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import scanner_base
+from scanner_base import parse_gemini_verdicts, validate_batch_with_gemini
+
+def test_parse_gemini_verdicts():
+    """JSON arrays and TRUE/FALSE lines are read; miscounted replies fail the batch."""
+    assert parse_gemini_verdicts('```json\n[true, false, true]\n```', 3) == [True, False, True]
+    assert parse_gemini_verdicts("TRUE\nFALSE", 2) == [True, False]
+    assert parse_gemini_verdicts("[true]", 2) is None
+
+def test_validate_batch_caches_verdicts(tmp_path, monkeypatch):
+    """Repeated and previously validated texts are not sent to Gemini; failures are not cached."""
+    calls = []
+    def fake_chunk(client, texts, site, criterion):
+        calls.append(texts)
+        return None if "down" in texts else ["win" in text for text in texts]
+    monkeypatch.setattr(scanner_base, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(scanner_base, "validate_chunk_with_gemini", fake_chunk)
+    monkeypatch.setattr(scanner_base, "GEMINI_BATCH_SIZE", 2)
+
+    assert validate_batch_with_gemini(None, ["a win", "b", "a win"], "X", "", "test") == [True, False, True]
+    assert validate_batch_with_gemini(None, ["down"], "X", "", "test") == [False]
+    calls.clear()
+    assert validate_batch_with_gemini(None, ["b", "a win", "down"], "X", "", "test") == [False, True, False]
+    assert calls == [["down"]]